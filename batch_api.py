@@ -0,0 +1,198 @@
+"""
+基于 OpenAI 兼容 Batch API 的离线推理。
+
+流程：
+- 用 DSPy Adapter 渲染每条新闻的分类提示词，写成 Batch 请求文件并提交。
+- 轮询直至批任务完成，解析分类结果并筛出目标类别。
+- 以同样方式提交抽取阶段，最终组装为与 ``NewsPipeline`` 一致的结构化结果。
+- ``unified`` 模式的 Pipeline 只需提交一次批任务。
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import dspy
+import litellm
+
+import config
+from model import TARGET_CATEGORIES, NewsMetadata, NewsPipeline
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+DEFAULT_POLL_INTERVAL = 30.0
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def run_batch_pipeline(
+    pipeline: NewsPipeline,
+    records: Sequence[NewsMetadata],
+    work_dir: Path,
+    *,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    通过 Batch API 执行 ``pipeline``（两阶段或 unified 单阶段），返回与 ``records`` 对齐的结果。
+
+    Args:
+        pipeline: 已加载（可选优化过）的 Pipeline，用于渲染提示词与 few-shot 示例。
+        records: 待处理的新闻元数据，未通过 ``NewsPipeline`` 预筛的记录不会提交。
+        work_dir: 保存请求/结果文件的目录，便于排查与复用。
+        poll_interval: 轮询批任务状态的间隔秒数。
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    if pipeline.unified:
+        return _run_unified(pipeline, records, work_dir, poll_interval)
+
+    classify_inputs = _candidate_inputs(pipeline, records)
+    classifications = _run_stage(
+        "classify",
+        pipeline.classifier,
+        config.classifier_lm,
+        classify_inputs,
+        work_dir,
+        poll_interval,
+    )
+
+    extract_inputs: Dict[int, Dict[str, Any]] = {}
+    for idx, outputs in classifications.items():
+        category = pipeline._normalize_category(outputs.get("category"))
+        if category in TARGET_CATEGORIES:
+            extract_inputs[idx] = {
+                "content": records[idx].raw_content,
+                "category": category,
+            }
+    extractions = _run_stage(
+        "extract",
+        pipeline.extractor,
+        config.extractor_lm,
+        extract_inputs,
+        work_dir,
+        poll_interval,
+    )
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    for idx, extraction in extractions.items():
+        record = records[idx]
+        results[idx] = pipeline._build_result(
+            extract_inputs[idx]["category"], extraction, record, record.raw_content
+        )
+    return results
+
+
+def _run_unified(
+    pipeline: NewsPipeline,
+    records: Sequence[NewsMetadata],
+    work_dir: Path,
+    poll_interval: float,
+) -> List[Optional[Dict[str, Any]]]:
+    inputs = _candidate_inputs(pipeline, records)
+    predictions = _run_stage(
+        "unified",
+        pipeline.unified_extractor,
+        config.extractor_lm,
+        inputs,
+        work_dir,
+        poll_interval,
+    )
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    for idx, prediction in predictions.items():
+        category = pipeline._normalize_category(prediction.get("category"))
+        if category in TARGET_CATEGORIES:
+            record = records[idx]
+            results[idx] = pipeline._build_result(
+                category, prediction, record, record.raw_content
+            )
+    return results
+
+
+def _candidate_inputs(
+    pipeline: NewsPipeline,
+    records: Sequence[NewsMetadata],
+) -> Dict[int, Dict[str, Any]]:
+    return {
+        idx: {"content": record.raw_content}
+        for idx, record in enumerate(records)
+        if pipeline._is_candidate(record.raw_content)
+    }
+
+
+def _run_stage(
+    stage: str,
+    module: dspy.Module,
+    lm: dspy.LM,
+    inputs: Mapping[int, Mapping[str, Any]],
+    work_dir: Path,
+    poll_interval: float,
+) -> Dict[int, Dict[str, Any]]:
+    if not inputs:
+        return {}
+    predictor = getattr(module, "predict", module)
+    adapter = dspy.settings.adapter or dspy.ChatAdapter()
+
+    request_path = work_dir / f"{stage}_requests.jsonl"
+    with request_path.open("w", encoding="utf-8") as fp:
+        for idx, fields in inputs.items():
+            messages = adapter.format(predictor.signature, predictor.demos, fields)
+            request = {
+                "custom_id": f"{idx}_{stage}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": config.LLM_CONFIG["model"],
+                    "messages": messages,
+                    **lm.kwargs,
+                },
+            }
+            fp.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+    output_text = _submit_and_wait(request_path, poll_interval)
+    output_path = work_dir / f"{stage}_output.jsonl"
+    output_path.write_text(output_text, encoding="utf-8")
+
+    parsed: Dict[int, Dict[str, Any]] = {}
+    for line in output_text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        idx = int(item["custom_id"].split("_", maxsplit=1)[0])
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            print(f"[WARN] Batch 请求 {item['custom_id']} 失败：{item.get('error')}")
+            continue
+        completion = response["body"]["choices"][0]["message"]["content"]
+        try:
+            parsed[idx] = adapter.parse(predictor.signature, completion)
+        except Exception as exc:  # noqa: BLE001
+            print(f"[WARN] 无法解析 {item['custom_id']} 的输出：{exc}")
+    return parsed
+
+
+def _submit_and_wait(request_path: Path, poll_interval: float) -> str:
+    provider = config.LLM_CONFIG.get("provider", "openai")
+    with request_path.open("rb") as fp:
+        input_file = litellm.create_file(
+            file=fp, purpose="batch", custom_llm_provider=provider
+        )
+    batch = litellm.create_batch(
+        completion_window=COMPLETION_WINDOW,
+        endpoint=BATCH_ENDPOINT,
+        input_file_id=input_file.id,
+        custom_llm_provider=provider,
+    )
+    print(f"[INFO] 已提交 Batch 任务 {batch.id}（{request_path.name}）")
+
+    while batch.status not in _TERMINAL_STATUSES:
+        time.sleep(poll_interval)
+        batch = litellm.retrieve_batch(batch_id=batch.id, custom_llm_provider=provider)
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch 任务 {batch.id} 未成功完成：{batch.status}")
+
+    content = litellm.file_content(
+        file_id=batch.output_file_id, custom_llm_provider=provider
+    )
+    return content.text
@@ -1,7 +1,10 @@
 """
 LLM 配置与实例化模块。
 
-该文件暴露 ``lm`` 对象，供 DSPy 在其他脚本中统一使用：
+该文件暴露 ``lm`` 对象，供 DSPy 在其他脚本中统一使用；``classifier_lm`` /
+``extractor_lm`` 为分类、抽取阶段各自的生成参数。``lm`` 会按
+``CHATANYWHERE_RPM`` / ``CHATANYWHERE_TPM`` 环境变量限制每分钟请求数与 token 数（未设置或为 0 表示不限），
+遇到 HTTP 429 时按 ``Retry-After`` 退避重试（同步 ``__call__`` 与异步 ``acall`` 均受限流）：
 
 >>> import dspy
 >>> import config
@@ -10,10 +13,18 @@ LLM 配置与实例化模块。
 
 from __future__ import annotations
 
+import asyncio
+import importlib.util
+import json
 import os
-from typing import Any, Dict
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
 
 import dspy
+import httpx
 import litellm
 
 # LLM配置
@@ -29,6 +40,11 @@ LLM_CONFIG: Dict[str, Any] = {
     "provider": "openai",
 }
 
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+
+# LiteLLM 共享连接池配置
+HTTP_POOL_SIZE = 64
+
 
 def _resolve_api_key() -> str:
     """优先从环境变量读取 Token，失败则回退到配置文件中的值。"""
@@ -50,6 +66,19 @@ def _configure_litellm(api_key: str) -> None:
     # LiteLLM 默认认为 OpenAI 风格接口，因此无需额外 headers/endpoint 配置。
 
 
+def _configure_http_pool() -> None:
+    """让 LiteLLM 复用进程级 httpx 连接池，避免每次调用重新建立 TCP/TLS 连接。"""
+    # HTTP/2 依赖可选的 h2 包，未安装时退回 HTTP/1.1 keep-alive。
+    http2 = importlib.util.find_spec("h2") is not None
+    limits = httpx.Limits(
+        max_connections=HTTP_POOL_SIZE,
+        max_keepalive_connections=HTTP_POOL_SIZE,
+    )
+    # 请求超时由 LiteLLM 按次传入，不在客户端上配置。
+    litellm.client_session = httpx.Client(http2=http2, limits=limits)
+    litellm.aclient_session = httpx.AsyncClient(http2=http2, limits=limits)
+
+
 def _build_model_name() -> str:
     """生成符合 dspy.LM 约定的模型名称（provider/model）。"""
     provider = LLM_CONFIG.get("provider", "openai")
@@ -59,12 +88,235 @@ def _build_model_name() -> str:
     return f"{provider}/{model_id}"
 
 
+def _read_limit(env_name: str) -> int:
+    raw_value = os.getenv(env_name, "").strip()
+    if not raw_value:
+        return 0
+    try:
+        return max(0, int(raw_value))
+    except ValueError as exc:
+        raise RuntimeError(f"环境变量 {env_name} 必须为整数：{raw_value}") from exc
+
+
+class _RateLimiter:
+    """以 60 秒滑动窗口限制请求数与 token 数，线程安全，可在多个 LM 间共享。"""
+
+    window = 60.0
+
+    def __init__(self, rpm: int = 0, tpm: int = 0) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self._lock = threading.Lock()
+        self._requests: Deque[float] = deque()
+        self._tokens: Deque[Tuple[float, int]] = deque()
+        self._token_total = 0
+
+    def acquire(self, tokens: int) -> None:
+        if not self.rpm and not self.tpm:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._evict(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._requests.append(now)
+                    self._tokens.append((now, tokens))
+                    self._token_total += tokens
+                    return
+            time.sleep(wait)
+
+    def _evict(self, now: float) -> None:
+        while self._requests and now - self._requests[0] >= self.window:
+            self._requests.popleft()
+        while self._tokens and now - self._tokens[0][0] >= self.window:
+            _, expired = self._tokens.popleft()
+            self._token_total -= expired
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        wait = 0.0
+        if self.rpm and len(self._requests) >= self.rpm:
+            wait = self._requests[0] + self.window - now
+        # 单次请求超过 TPM 时不再等待，避免永远无法放行。
+        if self.tpm and self._tokens and self._token_total + tokens > self.tpm:
+            wait = max(wait, self._tokens[0][0] + self.window - now)
+        return wait
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "_RateLimiter":
+        # DSPy 复制 LM/Module 时仍共用同一限流窗口。
+        return self
+
+
+# DSPy 2.x 直接抛出 LiteLLM 的异常，3.x 包装为 LMRateLimitError（携带 retry_after）。
+_RATE_LIMIT_ERRORS: Tuple[type, ...] = (litellm.RateLimitError,)
+try:
+    from dspy.utils.exceptions import LMRateLimitError
+except ImportError:  # pragma: no cover - 旧版 DSPy 无该异常类型
+    pass
+else:
+    _RATE_LIMIT_ERRORS += (LMRateLimitError,)
+
+# DSPy 3.x 通过 ``prepare`` 统一生成请求与缓存键，2.x 无此入口。
+try:
+    from dspy.clients.execution import prepare as _prepare_call
+except ImportError:  # pragma: no cover - DSPy 2.x
+    _prepare_call = None
+
+# 不参与 DSPy 响应缓存键的参数。
+_CACHE_IGNORED_ARGS = ["api_key", "api_base", "base_url"]
+
+
+class RateLimitedLM(dspy.LM):
+    """
+    在 ``dspy.LM`` 外层施加 RPM/TPM 限流，并对 429 按 ``Retry-After`` 退避重试。
+
+    DSPy 响应缓存命中的请求不占用限流额度；构造时应传入 ``num_retries=0``，
+    使 429 只由本类处理，不与 LiteLLM/DSPy 内部重试叠加。
+    """
+
+    def __init__(
+        self,
+        model: str,
+        *,
+        limiter: _RateLimiter,
+        max_rate_limit_retries: int = 5,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(model=model, **kwargs)
+        self.limiter = limiter
+        self.max_rate_limit_retries = max_rate_limit_retries
+
+    def __call__(self, prompt=None, messages=None, **kwargs):  # noqa: ANN001
+        tokens = self._estimate_tokens(prompt, messages, kwargs)
+        for attempt in range(self.max_rate_limit_retries + 1):
+            if not self._is_response_cached(prompt, messages, kwargs):
+                self.limiter.acquire(tokens)
+            try:
+                return super().__call__(prompt=prompt, messages=messages, **kwargs)
+            except _RATE_LIMIT_ERRORS as exc:
+                if attempt >= self.max_rate_limit_retries:
+                    raise
+                time.sleep(_retry_after_seconds(exc, attempt))
+
+    async def acall(self, prompt=None, messages=None, **kwargs):  # noqa: ANN001
+        tokens = self._estimate_tokens(prompt, messages, kwargs)
+        for attempt in range(self.max_rate_limit_retries + 1):
+            if not self._is_response_cached(prompt, messages, kwargs, asynchronous=True):
+                # 限流器基于线程锁，放到工作线程中等待，避免阻塞事件循环。
+                await asyncio.to_thread(self.limiter.acquire, tokens)
+            try:
+                return await super().acall(prompt=prompt, messages=messages, **kwargs)
+            except _RATE_LIMIT_ERRORS as exc:
+                if attempt >= self.max_rate_limit_retries:
+                    raise
+                await asyncio.sleep(_retry_after_seconds(exc, attempt))
+
+    def _is_response_cached(
+        self,
+        prompt: Optional[str],
+        messages: Any,
+        kwargs: Dict[str, Any],
+        *,
+        asynchronous: bool = False,
+    ) -> bool:
+        """
+        探测 DSPy 响应缓存是否已有该请求，命中时不占用限流额度。
+
+        DSPy 3.x 复用其 ``prepare`` 生成缓存键；2.x 按 ``cached_litellm_completion`` 的约定拼装
+        （2.x 的异步调用不走缓存）。无法探测时视为未命中，照常限流。
+        """
+        response_cache = getattr(dspy, "cache", None)
+        if response_cache is None:
+            return False
+        try:
+            if _prepare_call is not None:
+                call = _prepare_call(self, prompt, messages, kwargs, asynchronous=asynchronous)
+                if not call.cache:
+                    return False
+                key = call.key(self, asynchronous)
+                return response_cache.get(key, _CACHE_IGNORED_ARGS) is not None
+
+            if asynchronous or not kwargs.get("cache", self.cache):
+                return False
+            request = {
+                "model": self.model,
+                "messages": messages or [{"role": "user", "content": prompt}],
+                **self.kwargs,
+                **{k: v for k, v in kwargs.items() if k not in ("cache", "cache_in_memory")},
+                "_fn_identifier": "dspy.clients.lm.cached_litellm_completion",
+            }
+            return response_cache.get(request) is not None
+        except Exception:  # noqa: BLE001 - 探测失败时按未命中处理
+            return False
+
+    def _estimate_tokens(
+        self,
+        prompt: Optional[str],
+        messages: Any,
+        kwargs: Dict[str, Any],
+    ) -> int:
+        """估算输入 token 数并加上最大输出长度；优先使用 LiteLLM 的 tokenizer。"""
+        max_tokens = kwargs.get("max_tokens", self.kwargs.get("max_tokens", 0))
+        try:
+            if messages is not None:
+                prompt_tokens = litellm.token_counter(model=self.model, messages=messages)
+            else:
+                prompt_tokens = litellm.token_counter(model=self.model, text=prompt or "")
+        except Exception:  # noqa: BLE001 - tokenizer 不可用时按字符粗估
+            text = prompt if messages is None else json.dumps(messages, ensure_ascii=False)
+            prompt_tokens = _rough_token_count(text or "")
+        return int(prompt_tokens) + int(max_tokens or 0)
+
+
+def _rough_token_count(text: str) -> int:
+    """中文约每字一个 token，其余字符约每 4 个一个 token。"""
+    cjk_chars = len(_CJK_RE.findall(text))
+    return cjk_chars + (len(text) - cjk_chars + 3) // 4
+
+
+def _retry_after_seconds(exc: Exception, attempt: int) -> float:
+    hint = getattr(exc, "retry_after", None)
+    if isinstance(hint, (int, float)) and hint >= 0:
+        return float(hint)
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("retry-after") if hasattr(headers, "get") else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return float(min(2**attempt, 60))
+
+
 # 供外部引用的 LLM 对象
 _API_KEY = _resolve_api_key()
 _configure_litellm(_API_KEY)
+_configure_http_pool()
 
-lm = dspy.LM(
-    model=_build_model_name(),
-    max_tokens=1024,
-    temperature=0.3,
+rate_limiter = _RateLimiter(
+    rpm=_read_limit("CHATANYWHERE_RPM"),
+    tpm=_read_limit("CHATANYWHERE_TPM"),
 )
+
+
+def _build_lm(**kwargs: Any) -> RateLimitedLM:
+    # 429 重试统一由 RateLimitedLM 处理，关闭底层重试以免叠加且绕过限流。
+    return RateLimitedLM(
+        model=_build_model_name(),
+        limiter=rate_limiter,
+        num_retries=0,
+        **kwargs,
+    )
+
+
+# 全局默认 LM，同时用于抽取阶段；分类只需输出类别与简短推理，单独收紧生成上限。
+lm = _build_lm(max_tokens=1024, temperature=0.3)
+extractor_lm = lm
+classifier_lm = _build_lm(max_tokens=256, temperature=0.0)
+
+
+def disable_response_cache() -> None:
+    """关闭全部 LM 的 DSPy 请求级响应缓存，确保每次调用都真实请求模型。"""
+    for model in (lm, extractor_lm, classifier_lm):
+        model.cache = False
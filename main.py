@@ -3,61 +3,200 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
+import pickle
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
 
 import dspy
 
 import config
+from batch_api import run_batch_pipeline
 from model import NewsMetadata, NewsPipeline
-from utils import JsonlWriter, read_news_file
-
-dspy.settings.configure(lm=config.lm)
+from utils import JsonlWriter, read_news_file_stream
 
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_DATA_FILE = BASE_DIR / "test_data.xls"
 DEFAULT_OUTPUT_FILE = BASE_DIR / "result_output.jsonl"
 BEST_PIPELINE_PATH = BASE_DIR / "best_pipeline.json"
+BEST_UNIFIED_PIPELINE_PATH = BASE_DIR / "best_unified_pipeline.json"
+DEFAULT_MAX_WORKERS = 8
+LLM_CACHE_DIR = BASE_DIR / ".llmcache"
+# 去重复用时保留的抽取字段，元数据按每条记录单独填充。
+_EXTRACTION_FIELDS = ("category", "title", "short_summary", "detailed_summary")
+# 编译状态快照格式版本，结构变化时递增以使旧快照失效。
+STATE_SNAPSHOT_VERSION = 1
 
 
-def load_pipeline(compiled_path: Path) -> NewsPipeline:
-    pipeline = NewsPipeline()
+def load_pipeline(
+    compiled_path: Path,
+    *,
+    use_cache: bool = True,
+    unified: bool = False,
+    require_cjk: bool = False,
+) -> NewsPipeline:
+    pipeline = NewsPipeline(unified=unified, require_cjk=require_cjk)
+    cache_tag = ""
     if compiled_path.exists():
-        pipeline.load(str(compiled_path))
+        _load_compiled_state(pipeline, compiled_path)
+        cache_tag = str(compiled_path.stat().st_mtime_ns)
         print(f"[INFO] 已加载优化 Pipeline：{compiled_path}")
     else:
         print(f"[WARN] 未找到 {compiled_path}，将使用未优化模型。")
+    if use_cache:
+        pipeline.enable_cache(LLM_CACHE_DIR, tag=cache_tag)
     return pipeline
 
 
-def process_records(
+def _load_compiled_state(pipeline: NewsPipeline, compiled_path: Path) -> None:
+    """优先从 pickle 快照恢复编译状态，快照过期或版本不符时重新解析 JSON 并刷新快照。"""
+    snapshot = compiled_path.with_suffix(".pkl")
+    version = (STATE_SNAPSHOT_VERSION, dspy.__version__, pipeline.unified)
+    if snapshot.exists() and snapshot.stat().st_mtime >= compiled_path.stat().st_mtime:
+        try:
+            with snapshot.open("rb") as fp:
+                cached = pickle.load(fp)
+            if cached.get("version") == version:
+                pipeline.load_state(cached["state"])
+                return
+        except Exception as exc:  # noqa: BLE001 - 快照损坏时回退到 JSON
+            print(f"[WARN] 读取状态快照失败，改为解析 {compiled_path.name}：{exc}")
+
+    pipeline.load(str(compiled_path))
+    try:
+        with snapshot.open("wb") as fp:
+            pickle.dump({"version": version, "state": pipeline.dump_state()}, fp)
+    except Exception as exc:  # noqa: BLE001 - 快照仅为加速，失败不影响主流程
+        print(f"[WARN] 无法写入状态快照 {snapshot}：{exc}")
+
+
+async def process_records(
     pipeline: NewsPipeline,
     records: Iterable[dict],
     output_path: Path,
+    max_workers: int = DEFAULT_MAX_WORKERS,
 ) -> None:
+    """
+    基于 asyncio 并发推理，信号量限制在途请求数，结果按完成顺序写出。
+
+    ``records`` 按需逐条消费：在途请求达到上限时暂停读取，首条请求无需等待整份文件读完。
+    原文完全相同的记录只调用一次 Pipeline，结果按各自的元数据分别写出；
+    为此会保留每条唯一原文的抽取字段（不含原文），内存随唯一记录数增长。
+    调用失败时，等待同一结果的记录逐条告警，之后再出现的相同原文会重新调用。
+    """
+    async_pipeline = dspy.asyncify(pipeline)
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+    in_flight: Dict[bytes, List[NewsMetadata]] = {}
+    finished: Dict[bytes, Optional[Dict[str, Any]]] = {}
+    tasks: Set[asyncio.Task] = set()
     written = 0
+
     with JsonlWriter(output_path) as writer:
-        for record in records:
-            metadata = NewsMetadata(
-                raw_content=record.get("raw_content", ""),
-                release_time=record.get("release_time"),
-                source_institution=record.get("source_institution"),
-                url=record.get("url"),
+
+        def _emit(metadata: NewsMetadata, extraction: Dict[str, Any]) -> None:
+            nonlocal written
+            result = dict(extraction)
+            result.update(
+                pipeline._extract_metadata(
+                    metadata, fallback_content=metadata.raw_content
+                )
+            )
+            writer.append(_merge_summaries(result))
+            written += 1
+
+        async def _run(key: bytes, head: NewsMetadata) -> None:
+            try:
+                prediction = await async_pipeline(
+                    content=head.raw_content, metadata=head
+                )
+            except Exception as exc:  # noqa: BLE001
+                # 失败结果不记入 finished，之后再出现的相同原文会重新提交。
+                for metadata in in_flight.pop(key):
+                    print(f"[WARN] 处理失败（{metadata.url or '无链接'}）：{exc}")
+                return
+            finally:
+                semaphore.release()
+            extraction = (
+                None
+                if prediction is None
+                else {field: prediction[field] for field in _EXTRACTION_FIELDS}
             )
-            if not metadata.raw_content.strip():
+            finished[key] = extraction
+            for metadata in in_flight.pop(key):
+                if extraction is not None:
+                    _emit(metadata, extraction)
+
+        for metadata in _iter_metadata(records):
+            key = hashlib.blake2b(
+                metadata.raw_content.encode("utf-8"), digest_size=16
+            ).digest()
+            if key in finished:
+                if finished[key] is not None:
+                    _emit(metadata, finished[key])
+                continue
+            if key in in_flight:
+                in_flight[key].append(metadata)
                 continue
-            prediction = pipeline(content=metadata.raw_content, metadata=metadata)
+            in_flight[key] = [metadata]
+            await semaphore.acquire()
+            task = asyncio.create_task(_run(key, metadata))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    print(f"[INFO] 已写入 {written} 条结果至 {output_path}")
+
+
+def process_records_batch_api(
+    pipeline: NewsPipeline,
+    records: Iterable[dict],
+    output_path: Path,
+) -> None:
+    """
+    通过 Batch API 离线推理，适合对时延不敏感的大批量任务。
+
+    批任务需一次性提交全部请求，因此该路径会先将所有记录读入内存。
+    """
+    work_dir = output_path.with_name(f"{output_path.stem}_batch")
+    predictions = run_batch_pipeline(
+        pipeline, list(_iter_metadata(records)), work_dir
+    )
+    _write_predictions(predictions, output_path)
+
+
+def _iter_metadata(records: Iterable[dict]) -> Iterator[NewsMetadata]:
+    for record in records:
+        yield NewsMetadata(
+            raw_content=record.get("raw_content", ""),
+            release_time=record.get("release_time"),
+            source_institution=record.get("source_institution"),
+            url=record.get("url"),
+        )
+
+
+def _write_predictions(
+    predictions: Sequence[Optional[Dict[str, Any]]],
+    output_path: Path,
+) -> None:
+    written = 0
+    with JsonlWriter(output_path) as writer:
+        for prediction in predictions:
             if prediction is None:
                 continue
-            short_summary = prediction.get("short_summary")
-            detailed_summary = prediction.get("detailed_summary")
-            if short_summary and detailed_summary:
-                prediction["detailed_summary"] = f"{short_summary}\n{detailed_summary}"
-            writer.append(prediction)
+            writer.append(_merge_summaries(prediction))
             written += 1
     print(f"[INFO] 已写入 {written} 条结果至 {output_path}")
 
 
+def _merge_summaries(prediction: Dict[str, Any]) -> Dict[str, Any]:
+    short_summary = prediction.get("short_summary")
+    detailed_summary = prediction.get("detailed_summary")
+    if short_summary and detailed_summary:
+        prediction["detailed_summary"] = f"{short_summary}\n{detailed_summary}"
+    return prediction
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="新闻情报自动化抽取")
     parser.add_argument(
@@ -72,14 +211,58 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_OUTPUT_FILE,
         help="结果输出 JSONL 文件路径。",
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="同时在途的 LLM 请求上限。",
+    )
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="改用 OpenAI 兼容的 Batch API 离线提交，成本更低但需等待批任务完成。",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="禁用全部 LLM 缓存（.llmcache 结果缓存与 DSPy 请求缓存），每条记录都真实调用模型。",
+    )
+    parser.add_argument(
+        "--unified",
+        action="store_true",
+        help=f"单次 LLM 调用同时完成分类与抽取，加载 {BEST_UNIFIED_PIPELINE_PATH.name}。",
+    )
+    parser.add_argument(
+        "--require-cjk",
+        action="store_true",
+        help="跳过不含中文字符的原文（默认关闭）。",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    pipeline = load_pipeline(BEST_PIPELINE_PATH)
-    records = read_news_file(args.data_file)
-    process_records(pipeline, records, args.output_file)
+    if args.no_cache:
+        config.disable_response_cache()
+    dspy.settings.configure(
+        lm=config.lm, async_max_workers=max(1, args.max_workers)
+    )
+    compiled_path = BEST_UNIFIED_PIPELINE_PATH if args.unified else BEST_PIPELINE_PATH
+    pipeline = load_pipeline(
+        compiled_path,
+        use_cache=not args.no_cache,
+        unified=args.unified,
+        require_cjk=args.require_cjk,
+    )
+    records = read_news_file_stream(args.data_file)
+    if args.batch_api:
+        process_records_batch_api(pipeline, records, args.output_file)
+    else:
+        asyncio.run(
+            process_records(
+                pipeline, records, args.output_file, max_workers=args.max_workers
+            )
+        )
 
 
 if __name__ == "__main__":
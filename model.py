@@ -4,22 +4,40 @@
 核心组件：
 - ``NewsClassifier``：判断新闻类型。
 - ``IntelligenceExtractor``：一次性生成标题与多层摘要。
-- ``NewsPipeline``：串联分类与抽取，同时执行 Gatekeeper 逻辑。
+- ``UnifiedNewsExtractor``：单次调用同时完成分类与抽取。
+- ``NewsPipeline``：串联分类与抽取（或走单次调用路径），同时执行 Gatekeeper 逻辑。
 """
 
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Dict, Mapping, Optional
 
 import dspy
 
 import config
 
-dspy.settings.configure(lm=config.lm)
+try:
+    import diskcache
+except ImportError:  # pragma: no cover - 缓存为可选能力
+    diskcache = None
 
 TARGET_CATEGORIES = ["研究前沿", "产业应用", "政策计划"]
 
+# 零成本预筛：过短或明显为抓取失败页面的内容直接跳过，不调用 LLM。
+# 失效页面关键词只在短文本上匹配，避免误伤正文中引用这些字样的真实报道。
+MIN_CONTENT_LENGTH = 80
+BLOCKLIST_MAX_LENGTH = 300
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+_BLOCKLIST_RE = re.compile(
+    r"404 not found|access denied|页面不存在|页面已删除|内容已删除|访问受限|请开启\s*javascript",
+    re.IGNORECASE,
+)
+
 
 class NewsClassifier(dspy.Signature):
     """判定新闻类别，输出限定在目标列表内，否则返回“其他”。"""
@@ -44,7 +62,28 @@ class IntelligenceExtractor(dspy.Signature):
     )
 
 
-@dataclass
+class UnifiedNewsExtractor(dspy.Signature):
+    """
+    在单次调用中判定新闻类别并生成标题与两层摘要。
+
+    输出前先自检类别是否属于「研究前沿、产业应用、政策计划」，若不属于则类别填“其他”，
+    其余字段可留空。
+    """
+
+    content = dspy.InputField(desc="新闻原文内容。")
+    category = dspy.OutputField(
+        desc="新闻类型，仅可从「研究前沿、产业应用、政策计划、其他」中选择，输出必须是中文。"
+    )
+    title = dspy.OutputField(desc="中文标题，简洁直观，勿超过30个汉字。")
+    short_summary = dspy.OutputField(
+        desc="本期看点，单段中文简介，不可分条，控制在40个汉字以内。"
+    )
+    detailed_summary = dspy.OutputField(
+        desc="本期概要，使用(1)(2)(3)编号的中文分点描述，覆盖关键信息。"
+    )
+
+
+@dataclass(slots=True, frozen=True)
 class NewsMetadata:
     """读取文件后附加的元数据。"""
 
@@ -55,35 +94,135 @@ class NewsMetadata:
 
 
 class NewsPipeline(dspy.Module):
-    """串联分类与情报抽取的完整工作流。"""
+    """
+    串联分类与情报抽取的完整工作流。
+
+    ``unified=True`` 时改用 ``UnifiedNewsExtractor`` 单次调用完成分类与抽取，
+    LLM 往返减半；默认的两阶段结构与 ``optimize.py`` 编译出的 ``best_pipeline.json`` 保持兼容。
+    ``require_cjk=True`` 时额外跳过不含中文字符的内容（默认关闭，英文原文同样会生成中文摘要）。
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, unified: bool = False, require_cjk: bool = False) -> None:
         super().__init__()
-        self.classifier = dspy.ChainOfThought(NewsClassifier)
-        self.extractor = dspy.ChainOfThought(IntelligenceExtractor)
+        self.unified = unified
+        self.require_cjk = require_cjk
+        if unified:
+            self.unified_extractor = dspy.ChainOfThought(UnifiedNewsExtractor)
+        else:
+            self.classifier = dspy.ChainOfThought(NewsClassifier)
+            self.extractor = dspy.ChainOfThought(IntelligenceExtractor)
+        self._cache: Any = None
+        self._cache_tag = ""
+
+    def enable_cache(self, cache_dir: str | Path, tag: str = "") -> None:
+        """
+        启用基于磁盘的 LLM 结果缓存。
+
+        Args:
+            cache_dir: 缓存目录。
+            tag: 附加到缓存键的版本标记，例如编译文件的修改时间，变化后旧条目自动失效。
+        """
+        if diskcache is None:
+            print("[WARN] 未安装 diskcache，已跳过 LLM 结果缓存。")
+            return
+        self._cache = diskcache.Cache(str(cache_dir))
+        self._cache_tag = tag
 
     def forward(
         self,
         content: str,
         metadata: Optional[Mapping[str, Any] | NewsMetadata] = None,
     ) -> Optional[Dict[str, Any]]:
-        """处理单条新闻，返回结构化情报。"""
-        classification = self.classifier(content=content)
+        """
+        处理单条新闻，返回结构化情报。
+
+        分类阶段在 ``config.classifier_lm`` 上下文中执行，抽取阶段使用 ``config.extractor_lm``；
+        不修改 predictor 自身的 ``lm``，保存的编译状态中不会写入自定义 LM。
+        """
+        if not self._is_candidate(content):
+            return None
+        if self.unified:
+            with dspy.context(lm=config.extractor_lm):
+                prediction = self._cached_call(
+                    "unified", self.unified_extractor, content=content
+                )
+            normalized_category = self._normalize_category(prediction.category)
+            if normalized_category not in TARGET_CATEGORIES:
+                return None
+            return self._build_result(normalized_category, prediction, metadata, content)
+
+        with dspy.context(lm=config.classifier_lm):
+            classification = self._cached_call(
+                "classify", self.classifier, content=content
+            )
         normalized_category = self._normalize_category(classification.category)
         if normalized_category not in TARGET_CATEGORIES:
             return None
 
-        extraction = self.extractor(content=content, category=normalized_category)
-        result = {
-            "category": normalized_category,
-            "title": extraction.title.strip(),
-            "short_summary": extraction.short_summary.strip(),
-            "detailed_summary": extraction.detailed_summary.strip(),
+        with dspy.context(lm=config.extractor_lm):
+            extraction = self._cached_call(
+                "extract", self.extractor, content=content, category=normalized_category
+            )
+        return self._build_result(normalized_category, extraction, metadata, content)
+
+    def _cached_call(self, stage: str, module: dspy.Module, **fields: Any) -> Any:
+        if self._cache is None:
+            return module(**fields)
+        key = self._cache_key(stage, module, fields)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return dspy.Prediction(**cached)
+        prediction = module(**fields)
+        self._cache.set(key, prediction.toDict())
+        return prediction
+
+    def _cache_key(
+        self, stage: str, module: dspy.Module, fields: Mapping[str, Any]
+    ) -> str:
+        predictor = getattr(module, "predict", module)
+        lm = getattr(predictor, "lm", None) or dspy.settings.lm
+        payload = {
+            "stage": stage,
+            "fields": fields,
+            "model": getattr(lm, "model", ""),
+            "lm_kwargs": sorted(
+                (key, repr(value)) for key, value in getattr(lm, "kwargs", {}).items()
+            ),
+            "signature": hashlib.sha256(
+                repr(predictor.signature).encode("utf-8")
+            ).hexdigest(),
+            "tag": self._cache_tag,
         }
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
-        result.update(self._extract_metadata(metadata, fallback_content=content))
+    @classmethod
+    def _build_result(
+        cls,
+        category: str,
+        extraction: Mapping[str, Any],
+        metadata: Optional[Mapping[str, Any] | NewsMetadata],
+        content: str,
+    ) -> Dict[str, Any]:
+        result = {
+            "category": category,
+            "title": extraction["title"].strip(),
+            "short_summary": extraction["short_summary"].strip(),
+            "detailed_summary": extraction["detailed_summary"].strip(),
+        }
+        result.update(cls._extract_metadata(metadata, fallback_content=content))
         return result
 
+    def _is_candidate(self, content: Optional[str]) -> bool:
+        content = (content or "").strip()
+        if len(content) < MIN_CONTENT_LENGTH:
+            return False
+        if self.require_cjk and _CJK_RE.search(content) is None:
+            return False
+        if len(content) < BLOCKLIST_MAX_LENGTH and _BLOCKLIST_RE.search(content):
+            return False
+        return True
+
     @staticmethod
     def _normalize_category(category: Optional[str]) -> str:
         if not category:
@@ -107,13 +246,16 @@ class NewsPipeline(dspy.Module):
                 "url": None,
             }
         if isinstance(metadata, NewsMetadata):
-            meta_dict = asdict(metadata)
-        else:
-            meta_dict = dict(metadata)
+            return {
+                "raw_content": metadata.raw_content or fallback_content,
+                "release_time": metadata.release_time,
+                "source_institution": metadata.source_institution,
+                "url": metadata.url,
+            }
         return {
-            "raw_content": meta_dict.get("raw_content", fallback_content),
-            "release_time": meta_dict.get("release_time"),
-            "source_institution": meta_dict.get("source_institution"),
-            "url": meta_dict.get("url"),
+            "raw_content": metadata.get("raw_content", fallback_content),
+            "release_time": metadata.get("release_time"),
+            "source_institution": metadata.get("source_institution"),
+            "url": metadata.get("url"),
         }
 
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import argparse
 import json
 from pathlib import Path
 from typing import Iterable, List
@@ -11,10 +12,11 @@ import dspy
 import config
 from model import NewsPipeline
 
-dspy.settings.configure(lm=config.lm)
-
 EXAMPLE_PATH = Path(__file__).resolve().parent / "example.json"
 BEST_PIPELINE_PATH = Path(__file__).resolve().parent / "best_pipeline.json"
+BEST_UNIFIED_PIPELINE_PATH = (
+    Path(__file__).resolve().parent / "best_unified_pipeline.json"
+)
 
 
 def load_training_examples(path: Path) -> List[dspy.Example]:
@@ -50,17 +52,30 @@ def _safe_get(pred: dspy.Prediction, field: str):
     return getattr(pred, field, None)
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="编译优化 NewsPipeline")
+    parser.add_argument(
+        "--unified",
+        action="store_true",
+        help=f"优化单次调用的 unified Pipeline，保存至 {BEST_UNIFIED_PIPELINE_PATH.name}。",
+    )
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
+    dspy.settings.configure(lm=config.lm)
     trainset = load_training_examples(EXAMPLE_PATH)
-    pipeline = NewsPipeline()
+    pipeline = NewsPipeline(unified=args.unified)
     teleprompter = dspy.teleprompt.BootstrapFewShot(
         metric=evaluation_metric,
         max_bootstrapped_demos=min(4, len(trainset)),
         max_labeled_demos=len(trainset),
     )
     compiled_model = teleprompter.compile(student=pipeline, trainset=trainset)
-    compiled_model.save(str(BEST_PIPELINE_PATH))
-    print(f"已保存优化后的 Pipeline 至：{BEST_PIPELINE_PATH}")
+    output_path = BEST_UNIFIED_PIPELINE_PATH if args.unified else BEST_PIPELINE_PATH
+    compiled_model.save(str(output_path))
+    print(f"已保存优化后的 Pipeline 至：{output_path}")
 
 
 if __name__ == "__main__":
@@ -2,9 +2,9 @@
 数据读取与结果写出工具集合。
 
 功能点：
-- 根据文件后缀自适应选择 Excel/CSV 解析。
+- 根据文件后缀自适应选择 Excel/CSV 解析，支持逐条流式读取；Excel 会缓存 Parquet 快照。
 - 将不同命名的列映射为统一字段，方便主流程使用。
-- 将推理结果写入 JSONL 文件，并确保落盘。
+- 将推理结果写入 JSONL 文件，按批次及关闭时确保落盘。
 """
 
 from __future__ import annotations
@@ -12,12 +12,39 @@ from __future__ import annotations
 import json
 import os
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Sequence
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Sequence,
+    Tuple,
+)
 
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 未安装时回退到标准库 json
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - 未安装时不缓存 Parquet 快照
+    pa = pq = None
+
 ColumnAliases = Mapping[str, Sequence[str]]
 
+CSV_CHUNK_SIZE = 1024
+
+# 写入 Parquet 快照 schema 元数据的源文件指纹键。
+_SNAPSHOT_SOURCE_KEY = b"news_summary.source"
+
 DEFAULT_COLUMN_ALIASES: Dict[str, Sequence[str]] = {
     "release_time": ("资源发布时间", "发布时间", "时间"),
     "source_institution": ("资源来源机构", "来源", "机构"),
@@ -37,53 +64,111 @@ def read_news_file(
         file_path: 数据文件路径。
         column_aliases: 可选列映射，覆盖默认值时按需传入。
     """
-    column_aliases = column_aliases or DEFAULT_COLUMN_ALIASES
+    return list(read_news_file_stream(file_path, column_aliases))
+
+
+def read_news_file_stream(
+    file_path: str | Path,
+    column_aliases: ColumnAliases | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    逐条产出标准化记录，CSV 按块读取，内存占用与文件大小无关。
+
+    Args:
+        file_path: 数据文件路径。
+        column_aliases: 可选列映射，覆盖默认值时按需传入。
+    """
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"未找到数据文件：{path}")
 
     loader = _select_loader(path.suffix.lower())
     try:
-        df = loader(path)
+        frames = iter(loader(path))
     except Exception as exc:  # noqa: BLE001
         raise RuntimeError(f"读取文件失败：{path}") from exc
+    return _iter_records(path, frames, column_aliases)
+
+
+def _iter_records(
+    path: Path,
+    frames: Iterator[pd.DataFrame],
+    column_aliases: ColumnAliases | None,
+) -> Iterator[Dict[str, Any]]:
+    standardized_columns: MutableMapping[str, str | None] | None = None
+    while True:
+        try:
+            df = next(frames)
+        except StopIteration:
+            return
+        except Exception as exc:  # noqa: BLE001
+            raise RuntimeError(f"读取文件失败：{path}") from exc
 
-    df = df.fillna("")
-    standardized_columns = _build_column_mapping(df.columns, column_aliases)
-    missing = [field for field, column in standardized_columns.items() if column is None]
-    if missing:
-        raise KeyError(f"缺少必要列：{', '.join(missing)}")
+        if standardized_columns is None:
+            standardized_columns = _build_column_mapping(df.columns, column_aliases)
+            missing = [
+                field for field, column in standardized_columns.items() if column is None
+            ]
+            if missing:
+                raise KeyError(f"缺少必要列：{', '.join(missing)}")
 
-    results: List[Dict[str, Any]] = []
-    for _, row in df.iterrows():
-        record = {
-            field: str(row[column]).strip()
-            for field, column in standardized_columns.items()
-            if column is not None
-        }
-        results.append(record)
-    return results
+        standardized = pd.DataFrame(
+            {
+                field: _stringify(df[column])
+                for field, column in standardized_columns.items()
+                if column is not None
+            },
+            index=df.index,
+        )
+        yield from standardized.to_dict(orient="records")
+
+
+def _stringify(column: pd.Series) -> pd.Series:
+    """
+    将单列转换为去除首尾空白的字符串，空值记为空串。
+
+    日期时间列先转为 ``Timestamp`` 对象再逐个 ``str``，与逐行 ``str(value)`` 的格式一致
+    （如 ``2024-01-01 00:00:00``），不受整列是否含空值影响。
+    """
+    if pd.api.types.is_datetime64_any_dtype(column):
+        column = column.astype(object)
+    return column.fillna("").astype(str).str.strip()
 
 
 class JsonlWriter:
-    """按照 JSON Lines 格式写入，逐条 flush 并落盘。"""
+    """
+    按照 JSON Lines 格式写入，每 ``sync_every`` 条及关闭时 flush 并落盘。
+
+    已安装 ``orjson`` 时使用其序列化，输出恒为 UTF-8 原文，``ensure_ascii`` 参数将被忽略；
+    否则回退到标准库 ``json`` 并遵循 ``ensure_ascii``。
+    """
 
-    def __init__(self, file_path: str | Path, *, ensure_ascii: bool = False) -> None:
+    def __init__(
+        self,
+        file_path: str | Path,
+        *,
+        ensure_ascii: bool = False,
+        sync_every: int = 512,
+    ) -> None:
         self.file_path = Path(file_path)
         self.ensure_ascii = ensure_ascii
+        self.sync_every = max(1, sync_every)
         self._fp: Any = None
+        self._since_sync = 0
 
     def __enter__(self) -> "JsonlWriter":
         self.file_path.parent.mkdir(parents=True, exist_ok=True)
-        self._fp = self.file_path.open("w", encoding="utf-8")
+        self._fp = self.file_path.open("wb", buffering=1 << 20)
+        self._since_sync = 0
         return self
 
     def append(self, record: Mapping[str, Any]) -> None:
         if self._fp is None:
             raise RuntimeError("JsonlWriter 尚未打开。")
-        line = json.dumps(record, ensure_ascii=self.ensure_ascii)
-        self._fp.write(line + "\n")
-        self._flush()
+        self._fp.write(self._dumps(record) + b"\n")
+        self._since_sync += 1
+        if self._since_sync >= self.sync_every:
+            self._flush()
 
     def __exit__(self, exc_type, exc, tb) -> None:  # noqa: D401
         if self._fp is None:
@@ -92,11 +177,17 @@ class JsonlWriter:
         self._fp.close()
         self._fp = None
 
+    def _dumps(self, record: Mapping[str, Any]) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(record)
+        return json.dumps(record, ensure_ascii=self.ensure_ascii).encode("utf-8")
+
     def _flush(self) -> None:
         if self._fp is None:
             return
         self._fp.flush()
         os.fsync(self._fp.fileno())
+        self._since_sync = 0
 
 
 def write_jsonl(
@@ -121,31 +212,88 @@ def write_json(
     write_jsonl(records, file_path)
 
 
-def _select_loader(suffix: str):
+def _select_loader(suffix: str) -> Callable[[Path], Iterable[pd.DataFrame]]:
     if suffix in {".xls", ".xlsx"}:
-        return lambda file_path: pd.read_excel(file_path)  # type: ignore[return-value]
+        return lambda file_path: [_read_excel_cached(file_path)]
     if suffix == ".csv":
-        return lambda file_path: pd.read_csv(file_path)  # type: ignore[return-value]
+        # 统一按原始文本读取，避免分块推断出的类型不一致（如 20250101 与 20250101.0）。
+        return lambda file_path: pd.read_csv(
+            file_path, chunksize=CSV_CHUNK_SIZE, dtype=str, keep_default_na=False
+        )
     raise ValueError(f"暂不支持的文件格式：{suffix}")
 
 
+def _read_excel_cached(file_path: Path) -> pd.DataFrame:
+    """
+    读取 Excel，并在源文件旁缓存 Parquet 快照。
+
+    快照的 schema 元数据记录源文件的大小与纳秒级修改时间，两者与当前源文件完全一致时才复用，
+    源文件被替换（即使修改时间更早）后会重新解析。
+    """
+    if pq is None:
+        return pd.read_excel(file_path)
+
+    snapshot = file_path.with_name(file_path.name + ".parquet")
+    fingerprint = _source_fingerprint(file_path)
+    if snapshot.exists():
+        try:
+            metadata = pq.read_schema(snapshot).metadata or {}
+            if metadata.get(_SNAPSHOT_SOURCE_KEY) == fingerprint:
+                return pd.read_parquet(snapshot, engine="pyarrow")
+        except Exception as exc:  # noqa: BLE001 - 快照损坏时回退
+            print(f"[WARN] 读取 Parquet 快照失败，改为解析 Excel：{exc}")
+
+    df = pd.read_excel(file_path)
+    try:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), _SNAPSHOT_SOURCE_KEY: fingerprint}
+        )
+        pq.write_table(table, snapshot, compression="zstd")
+    except Exception as exc:  # noqa: BLE001 - 快照仅为加速，失败不影响主流程
+        print(f"[WARN] 无法写入 Parquet 快照 {snapshot}：{exc}")
+    return df
+
+
+def _source_fingerprint(file_path: Path) -> bytes:
+    stat = file_path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}".encode("ascii")
+
+
 def _normalize(name: Any) -> str:
     return str(name).replace("：", ":").strip().lower()
 
 
+_NORMALIZED_DEFAULT_ALIASES: Dict[str, Tuple[str, ...]] = {
+    field: tuple(_normalize(alias) for alias in aliases)
+    for field, aliases in DEFAULT_COLUMN_ALIASES.items()
+}
+
+
+def _normalize_aliases(
+    column_aliases: ColumnAliases | None,
+) -> Mapping[str, Tuple[str, ...]]:
+    if not column_aliases:
+        return _NORMALIZED_DEFAULT_ALIASES
+    return {
+        field: tuple(_normalize(alias) for alias in aliases)
+        for field, aliases in column_aliases.items()
+    }
+
+
 def _build_column_mapping(
     columns: Iterable[Any],
-    column_aliases: ColumnAliases,
+    column_aliases: ColumnAliases | None = None,
 ) -> MutableMapping[str, str | None]:
-    normalized = {_normalize(col): str(col) for col in columns}
+    original = pd.Index(columns).astype(str)
+    normalized = (
+        original.str.replace("：", ":", regex=False).str.strip().str.lower()
+    )
+    lookup = dict(zip(normalized, original))
     mapping: MutableMapping[str, str | None] = {}
-    for field, aliases in column_aliases.items():
-        target_column = None
-        for alias in aliases:
-            alias_norm = _normalize(alias)
-            if alias_norm in normalized:
-                target_column = normalized[alias_norm]
-                break
-        mapping[field] = target_column
+    for field, aliases in _normalize_aliases(column_aliases).items():
+        mapping[field] = next(
+            (lookup[alias_norm] for alias_norm in aliases if alias_norm in lookup),
+            None,
+        )
     return mapping
-